@@ -1,27 +1,62 @@
 
+import functools
 import logging
+import os
+import time
 
 import g4f
 from g4f.Provider import RetryProvider
+from aiolimiter import AsyncLimiter
 import asyncio
+from collections import defaultdict, Counter
 
 import db
+import llm_cache
+import semantic_cache
 import user_manager
 import utils
 
 log = logging.getLogger(__name__)
 
+try:
+    import tiktoken
+    _enc = tiktoken.encoding_for_model("gpt-3.5-turbo")
+except Exception:
+    _enc = None
+
+POST_TOKEN_LIMIT = 60
+PROMPT_TOKEN_BUDGET = 2000
+
+SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "8"))
+G4F_RPM = int(os.getenv("G4F_RPM", "20"))
+
+_llm_limit = AsyncLimiter(G4F_RPM, 60)
+
+CIRCUIT_FAILURES = 3
+CIRCUIT_COOLDOWN = 30
+_fail_count = 0
+_suspended_until = 0.0
+
 
 g4f_prov = None
-g4f_initialized = False
+
+# Resolved once in initialize_g4f so call sites don't re-branch on the
+# provider for every request
+_llm_call = functools.partial(g4f.ChatCompletion.create_async, model="gpt-3.5-turbo")
+
+# Set once initialize_g4f completes; callers during startup wait on it
+# instead of erroring out
+_ready = asyncio.Event()
+
+READY_TIMEOUT = 5.0
 
 
 def initialize_g4f(prov_name="auto"):
-    global g4f_prov, g4f_initialized
+    global g4f_prov, _llm_call
     try:
-        
+
         if prov_name and prov_name.lower() != "auto":
-            
+
             try:
                 g4f_prov = getattr(g4f.Provider, prov_name)
                 log.info(f"G4F initialized with prov: {prov_name}")
@@ -31,74 +66,172 @@ def initialize_g4f(prov_name="auto"):
         else:
             g4f_prov = None  # Auto-select
             log.info("G4F initialized with auto prov selection")
-        
-        g4f_initialized = True
+
+        if g4f_prov:
+            _llm_call = functools.partial(
+                g4f.ChatCompletion.create_async,
+                model="gpt-3.5-turbo",
+                provider=g4f_prov
+            )
+        else:
+            _llm_call = functools.partial(g4f.ChatCompletion.create_async, model="gpt-3.5-turbo")
+
+        _ready.set()
     except Exception as e:
         log.error(f"Error initializing G4F: {e}")
-        g4f_initialized = False
+        _ready.clear()
+
+
+async def _wait_ready():
+    """Wait briefly for G4F init, returns False if it never came up"""
+    try:
+        await asyncio.wait_for(_ready.wait(), timeout=READY_TIMEOUT)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+def _breaker_check():
+    """Raise if the breaker is open - every g4f call path goes through this"""
+    if time.monotonic() < _suspended_until:
+        raise RuntimeError("G4F calls suspended - too many consecutive failures")
+
+
+def _breaker_failure():
+    global _fail_count, _suspended_until
+
+    _fail_count += 1
+    if _fail_count >= CIRCUIT_FAILURES:
+        _suspended_until = time.monotonic() + CIRCUIT_COOLDOWN
+        log.warning(f"Suspending G4F calls for {CIRCUIT_COOLDOWN}s after {_fail_count} consecutive failures")
+
+
+def _breaker_success():
+    global _fail_count
+    _fail_count = 0
+
+
+async def _call_g4f(msgs):
+    """Rate-limited g4f call with a simple circuit breaker"""
+
+    _breaker_check()
+
+    async with _llm_limit:
+        try:
+            res = await _llm_call(messages=msgs)
+        except Exception:
+            _breaker_failure()
+            raise
+
+        _breaker_success()
+        return res
+
+
+def _trim_tokens(text, max_tokens):
+    """Trim text to a token budget (approximate chars if tiktoken is missing)"""
+    if not text:
+        return text
+
+    if _enc is None:
+        return text[:max_tokens * 4]
+
+    ids = _enc.encode(text)
+    if len(ids) > max_tokens:
+        return _enc.decode(ids[:max_tokens]) + "…"
+    return text
+
+
+def _count_tokens(text):
+
+    if _enc is None:
+        return len(text) // 4
+    return len(_enc.encode(text))
+
+
+def _build_sum_msgs(posts):
+    """Build the summary prompt and message list for a batch of posts"""
+
+    posts_by_category = defaultdict(list)
+    for post in posts:
+        posts_by_category[post["cat"]].append(post)
+
+
+    parts = [
+        "You are a helpful assistant that summarizes RSS feed updates. ",
+        f"Please provide a clear, organized sum of {len(posts)} recent posts ",
+        "grouped by category. For each post, include the title and a brief key point.\n\n"
+    ]
+
+    used_tokens = 0
+    dropped = 0
+
+    for category, category_posts in posts_by_category.items():
+        parts.append(f"\n**{category}** ({len(category_posts)} posts):\n")
+
+        for i, post in enumerate(category_posts, 1):
+            if dropped:
+                dropped += 1
+                continue
+
+            post_sum = _trim_tokens(post.get("summary", ""), POST_TOKEN_LIMIT)
+            block = f"{i}. {post['title']}\n"
+            if post_sum:
+                block += f"   {post_sum}\n"
+            block += f"   Link: {post['link']}\n"
+
+            used_tokens += _count_tokens(block)
+            if used_tokens > PROMPT_TOKEN_BUDGET:
+                dropped = 1
+                continue
+
+            parts.append(block)
+
+    if dropped:
+        parts.append(f"\n(+{dropped} more posts omitted)\n")
+
+    parts.append("\n\nPlease create a concise sum that highlights the most important points and trends.")
+    prompt = "".join(parts)
+
+    msgs = [
+        {"role": "system", "content": "You are a helpful assistant that creates concise, informative summaries of news and content updates."},
+        {"role": "user", "content": prompt}
+    ]
+
+    return msgs, prompt
 
 
 async def generate_sum(posts, user_preferences = None) -> str:
 
-    global g4f_initialized
-    
-    if not g4f_initialized:
+    if not await _wait_ready():
         return "Error: G4F not initialized. Please restart the bot."
-    
+
     if not posts:
         return "No new posts to summarize."
-    
+
     try:
-        
-        posts_by_category = {}
-        for post in posts:
-            category = post["category_name"]
-            if category not in posts_by_category:
-                posts_by_category[category] = []
-            posts_by_category[category].append(post)
-        
-        
-        prompt = "You are a helpful assistant that summarizes RSS feed updates. "
-        prompt += f"Please provide a clear, organized sum of {len(posts)} recent posts "
-        prompt += "grouped by category. For each post, include the title and a brief key point.\n\n"
-        
-        for category, category_posts in posts_by_category.items():
-            prompt += f"\n**{category}** ({len(category_posts)} posts):\n"
-            
-            for i, post in enumerate(category_posts, 1):
-                title = post["title"]
-                sum = post.get("sum", "")[:200]  # Limit sum length
-                prompt += f"{i}. {title}\n"
-                if sum:
-                    prompt += f"   {sum}\n"
-                prompt += f"   Link: {post['link']}\n"
-        
-        prompt += "\n\nPlease create a concise sum that highlights the most important points and trends."
-        
-        
-        msgs = [
-            {"role": "system", "content": "You are a helpful assistant that creates concise, informative summaries of news and content updates."},
-            {"role": "user", "content": prompt}
-        ]
-        
-        
-        if g4f_prov:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs,
-                prov=g4f_prov
-            )
-        else:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs
-            )
-        
+        msgs, prompt = _build_sum_msgs(posts)
+
+
+        cache_key = llm_cache.make_key("gpt-3.5-turbo", msgs)
+        cached = await llm_cache.get(cache_key)
+        if cached:
+            log.info(f"Returning cached sum for {len(posts)} posts")
+            return cached
+
+
+        similar = await semantic_cache.lookup(prompt)
+        if similar:
+            return similar
+
+
+        res = await _call_g4f(msgs)
+
         sum = res
         log.info(f"Generated sum for {len(posts)} posts using G4F")
-        
+
+        await llm_cache.set(cache_key, sum)
+        await semantic_cache.store(prompt, sum)
+
         return sum
     
     except Exception as e:
@@ -106,10 +239,53 @@ async def generate_sum(posts, user_preferences = None) -> str:
         return f"Error generating sum: {str(e)}"
 
 
+async def generate_sum_stream(posts):
+    """Yield the summary incrementally as the model produces it"""
+    if not await _wait_ready():
+        yield "Error: G4F not initialized. Please restart the bot."
+        return
+
+    msgs, prompt = _build_sum_msgs(posts)
+
+
+    cache_key = llm_cache.make_key("gpt-3.5-turbo", msgs)
+    cached = await llm_cache.get(cache_key)
+    if cached:
+        yield cached
+        return
+
+    similar = await semantic_cache.lookup(prompt)
+    if similar:
+        yield similar
+        return
+
+    _breaker_check()
+
+    chunks = []
+    async with _llm_limit:
+        try:
+            stream = _llm_call(messages=msgs, stream=True)
+
+            async for chunk in await stream:
+                chunk = str(chunk)
+                chunks.append(chunk)
+                yield chunk
+        except Exception:
+            _breaker_failure()
+            raise
+
+        _breaker_success()
+
+    full = "".join(chunks)
+    if full:
+        await llm_cache.set(cache_key, full)
+        await semantic_cache.store(prompt, full)
+
+
 async def generate_user_sum(uid, limit=50):
     try:
         
-        posts = await db.get_unread_posts(uid, limit)
+        posts, categories = await db.get_unread_posts_with_counts(uid, limit)
         
         if not posts:
             return {
@@ -122,13 +298,7 @@ async def generate_user_sum(uid, limit=50):
         
         
         sum_text = await generate_sum(posts)
-        
-        
-        categories = {}
-        for post in posts:
-            cat = post["category_name"]
-            categories[cat] = categories.get(cat, 0) + 1
-        
+
         return {
             "success": True,
             "sum": sum_text,
@@ -148,68 +318,181 @@ async def generate_user_sum(uid, limit=50):
 async def send_sum_to_user(bot, uid, clear_after = True):
 
     try:
-        result = await generate_user_sum(uid)
-        
-        if not result["success"]:
-            
+        posts, categories = await db.get_unread_posts_with_counts(uid)
+
+
+        try:
+            user = bot.get_user(uid) or await bot.fetch_user(uid)
+        except Exception as e:
+            log.error(f"Failed to fetch user {uid}: {e}")
+            return False
+
+        if not posts:
+
             try:
-                user = await bot.fetch_user(uid)
-                await user.send(result["msg"])
+                await user.send("You have no unread posts!")
             except Exception as e:
                 log.error(f"Failed to send error msg to {uid}: {e}")
             return False
-        
-        
-        embed = utils.create_summary_embed(
-            sum=result["sum"],
-            total_posts=result["total_posts"],
-            categories=result["categories"]
-        )
-        
-        
+
+
         try:
-            user = await bot.fetch_user(uid)
-            await user.send(embed=embed)
+            msg = await user.send("⏳ Generating your summary...")
+
+            buf = ""
+            last_edit = time.monotonic()
+
+            async for chunk in generate_sum_stream(posts):
+                buf += chunk
+
+                if time.monotonic() - last_edit > 0.5:
+                    await msg.edit(content=buf[-1900:])
+                    last_edit = time.monotonic()
+
+            embed = utils.create_summary_embed(
+                summary=buf,
+                total_posts=len(posts),
+                categories=categories
+            )
+
+            await msg.edit(content=None, embed=embed)
             log.info(f"Sent sum to user {uid}")
-            
-            
+
+
             if clear_after:
                 await db.clear_unread_posts(uid)
                 log.info(f"Cleared unread posts for user {uid}")
-            
+
             return True
         except Exception as e:
             log.error(f"Failed to send sum to {uid}: {e}")
             return False
-    
+
     except Exception as e:
         log.error(f"Error in send_sum_to_user for {uid}: {e}")
         return False
 
 
+def _post_key(post):
+    return post.get("link") or post["title"]
+
+
+def _compose_digest(posts, snippets):
+    """Assemble a per-user digest locally from shared post snippets"""
+    by_category = defaultdict(list)
+    for post in posts:
+        by_category[post["cat"]].append(post)
+
+    parts = []
+    for category, category_posts in by_category.items():
+        parts.append(f"**{category}**")
+
+        for post in category_posts:
+            snippet = snippets.get(_post_key(post))
+            if snippet:
+                parts.append(f"• **{post['title']}** — {snippet}")
+            else:
+                parts.append(f"• **{post['title']}**")
+
+        parts.append("")
+
+    return "\n".join(parts).strip()
+
+
+async def _send_batch_sum(bot, uid, posts, sum_text):
+
+    try:
+        categories = Counter(post["cat"] for post in posts)
+
+        embed = utils.create_summary_embed(
+            summary=sum_text,
+            total_posts=len(posts),
+            categories=categories
+        )
+
+        user = bot.get_user(uid) or await bot.fetch_user(uid)
+        await user.send(embed=embed)
+        await db.clear_unread_posts(uid)
+        return True
+    except Exception as e:
+        log.error(f"Failed to send batch sum to {uid}: {e}")
+        return False
+
+
 async def send_daily_summaries(bot):
 
     try:
         log.info("Starting daily sum generation")
-        
+
         users = await user_manager.get_all_active_users()
-        success_count = 0
-        
-        for user in users:
-            uid = user["uid"]
-            
-            
-            unread_count = await db.get_unread_count(uid)
-            if unread_count == 0:
-                log.debug(f"User {uid} has no unread posts, skipping")
+
+
+        sem = asyncio.Semaphore(SUMMARY_MAX_CONCURRENCY)
+
+        async def _fetch_posts(user):
+            async with sem:
+                return user["uid"], await db.get_unread_posts(user["uid"])
+
+        fetched = await asyncio.gather(*[_fetch_posts(user) for user in users], return_exceptions=True)
+
+        user_posts = {}
+        for item in fetched:
+            if isinstance(item, Exception):
+                log.error(f"Error fetching unread posts: {item}")
                 continue
-            
-            
-            if await send_sum_to_user(bot, uid, clear_after=True):
-                success_count += 1
-        
-        log.info(f"Daily summaries sent to {success_count}/{len(users)} users")
-    
+            uid, posts = item
+            if posts:
+                user_posts[uid] = posts
+
+        if not user_posts:
+            log.info("No users with unread posts, skipping daily summaries")
+            return
+
+        # Summarize each unique post once - users sharing feeds reuse the
+        # same snippet instead of paying for their own LLM call
+        unique_posts = {}
+        for posts in user_posts.values():
+            for post in posts:
+                unique_posts.setdefault(_post_key(post), post)
+
+        async def _snippet(key, post):
+            async with sem:
+                return key, await generate_quick_sum(post["title"], post.get("summary", ""))
+
+        snippet_results = await asyncio.gather(
+            *[_snippet(key, post) for key, post in unique_posts.items()],
+            return_exceptions=True
+        )
+
+        snippets = {}
+        for item in snippet_results:
+            if isinstance(item, Exception):
+                log.error(f"Error generating post snippet: {item}")
+                continue
+            key, text = item
+            if text and not text.startswith("Error"):
+                snippets[key] = text
+
+        log.info(f"Generated {len(snippets)} snippets for {len(unique_posts)} unique posts "
+                 f"across {len(user_posts)} users")
+
+
+        async def _dispatch(uid):
+            async with sem:
+                digest = _compose_digest(user_posts[uid], snippets)
+                return 1 if await _send_batch_sum(bot, uid, user_posts[uid], digest) else 0
+
+        results = await asyncio.gather(*[_dispatch(uid) for uid in user_posts], return_exceptions=True)
+
+        success_count = 0
+        for r in results:
+            if isinstance(r, Exception):
+                log.error(f"Error in daily summary task: {r}")
+            else:
+                success_count += r
+
+        log.info(f"Daily summaries sent to {success_count}/{len(user_posts)} users")
+
     except Exception as e:
         log.error(f"Error sending daily summaries: {e}")
 
@@ -226,11 +509,9 @@ async def generate_category_sum(category, days=7):
 
 async def generate_quick_sum(title, content) -> str:
 
-    global g4f_initialized
-    
-    if not g4f_initialized:
+    if not await _wait_ready():
         return "Error: G4F not initialized"
-    
+
     try:
         prompt = f"Please provide a brief 2-3 sentence sum of this article:\n\n"
         prompt += f"Title: {title}\n\n"
@@ -240,32 +521,25 @@ async def generate_quick_sum(title, content) -> str:
             {"role": "system", "content": "You are a helpful assistant that creates brief, clear summaries."},
             {"role": "user", "content": prompt}
         ]
-        
-        if g4f_prov:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs,
-                prov=g4f_prov
-            )
-        else:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs
-            )
-        
+
+        cache_key = llm_cache.make_key("gpt-3.5-turbo", msgs)
+        cached = await llm_cache.get(cache_key)
+        if cached:
+            return cached
+
+        res = await _call_g4f(msgs)
+
+        await llm_cache.set(cache_key, res)
+
         return res
-    
+
     except Exception as e:
         log.error(f"Error generating quick sum: {e}")
         return f"Error: {str(e)}"
 
 
 async def test_g4f_connection():
-    global g4f_initialized
-    
-    if not g4f_initialized:
+    if not await _wait_ready():
         return False, "G4F not initialized"
     
     try:
@@ -273,19 +547,7 @@ async def test_g4f_connection():
             {"role": "user", "content": "Say 'hello' if you can read this."}
         ]
         
-        if g4f_prov:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs,
-                prov=g4f_prov
-            )
-        else:
-            res = await asyncio.to_thread(
-                g4f.ChatCompletion.create,
-                model="gpt-3.5-turbo",
-                msgs=msgs
-            )
+        res = await _call_g4f(msgs)
         
         return True, f"G4F connection successful! Response: {res[:50]}..."
     
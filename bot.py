@@ -1,28 +1,42 @@
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 import logging
+import logging.handlers
 import os
-import json
+import queue
 import asyncio
+from pathlib import Path
+
+import orjson
 from dotenv import load_dotenv
 
 import db
+import llm_cache
 import user_manager
 import feed_manager
 import ai_summary
+import semantic_cache
 import utils
 
 load_dotenv()
 
 
+# Log records are enqueued from the event loop and written to disk by a
+# background thread, so log calls inside async paths never block on I/O
+_log_queue = queue.SimpleQueue()
+_log_listener = logging.handlers.QueueListener(
+    _log_queue,
+    logging.FileHandler('feedybot.log'),
+    logging.StreamHandler()
+)
+_log_listener.start()
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('feedybot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
 log = logging.getLogger(__name__)
 
@@ -33,16 +47,34 @@ interval = int(os.getenv("FEED_CHECK_INTERVAL", "15"))
 sumhour = int(os.getenv("DAILY_SUMMARY_HOUR", "9"))
 
 
-f = open("config.json", "r")
-cfg = json.load(f)
-f.close()
+cfg = orjson.loads(Path("config.json").read_bytes())
 
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+class FeedyBot(commands.Bot):
+
+    async def _async_setup_hook(self):
+        await super()._async_setup_hook()
+        # Widen the HTTP connector before the session is created during
+        # login - the default 100-connection limit bottlenecks DM fanout
+        self.http.connector = aiohttp.TCPConnector(limit=0, limit_per_host=50)
+
+
+bot = FeedyBot(command_prefix="!", intents=intents)
+
+# Strong references to fire-and-forget tasks so the event loop
+# doesn't garbage-collect them mid-flight
+_bg_tasks = set()
+
+
+def _spawn_task(coro):
+    task = asyncio.create_task(coro)
+    _bg_tasks.add(task)
+    task.add_done_callback(_bg_tasks.discard)
+    return task
 
 
 @bot.event
@@ -52,18 +84,24 @@ async def on_ready():
     
     
     await db.init_db()
+    await llm_cache.init_cache()
     log.info("Database initialized")
     
     
-    for cat, fds in cfg["default_categories"].items():
-        await db.add_category(cat)
-        for fd in fds:
-            await db.add_feed(cat, fd)
+    await asyncio.gather(*(db.add_category(cat) for cat in cfg["default_categories"]))
+    await asyncio.gather(*(
+        db.add_feed(cat, fd)
+        for cat, fds in cfg["default_categories"].items()
+        for fd in fds
+    ))
     log.info("Default categories loaded")
     
     
     ai_summary.initialize_g4f(prov)
     log.info("G4F (GPT4Free) initialized - AI summaries enabled!")
+
+
+    await semantic_cache.initialize()
     
     
     try:
@@ -312,15 +350,28 @@ async def myfeeds_command(interaction):
             title="📰 Your Subscribed Feeds",
             color=utils.get_embed_color()
         )
-        
-        for category, feed_list in feeds.items():
+
+        counts = {category: len(feed_list) for category, feed_list in feeds.items()}
+        total_feeds = sum(counts.values())
+
+        # Discord silently drops fields beyond 25 - keep the biggest
+        # categories and collapse the rest into one line
+        ranked = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+
+        for category, count in ranked[:24]:
             embed.add_field(
                 name=f"📂 {category}",
-                value=f"{len(feed_list)} feeds",
+                value=f"{count} feeds",
                 inline=True
             )
-        
-        total_feeds = sum(len(f) for f in feeds.values())
+
+        if len(ranked) > 24:
+            embed.add_field(
+                name="…",
+                value=f"and {len(ranked) - 24} more categories",
+                inline=True
+            )
+
         embed.set_footer(text=f"Total: {total_feeds} feeds across {len(feeds)} categories")
         
         await interaction.followup.send(embed=embed)
@@ -566,7 +617,7 @@ class CategorySelect(discord.ui.Select):
                             log.error(f"Error sending previews: {e}")
                     
                     
-                    asyncio.create_task(send_previews())
+                    _spawn_task(send_previews())
             else:
                 embed = utils.create_error_embed("Failed to update subscriptions.")
                 await interaction.response.edit_message(embed=embed, view=None)
@@ -597,6 +648,27 @@ def main():
     finally:
         feed_manager.stop_scheduler()
 
+        async def _shutdown():
+            # Each step in its own try so one failure can't skip the rest
+            try:
+                await semantic_cache.flush()
+            except Exception as e:
+                log.error(f"Error flushing semantic cache: {e}")
+            try:
+                await feed_manager.close_session()
+            except Exception as e:
+                log.error(f"Error closing HTTP session: {e}")
+            try:
+                await db.close_db()
+            except Exception as e:
+                log.error(f"Error closing database: {e}")
+
+        try:
+            asyncio.run(_shutdown())
+        except Exception as e:
+            log.error(f"Error during shutdown: {e}")
+        _log_listener.stop()
+
 
 if __name__ == "__main__":
     main()
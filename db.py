@@ -1,211 +1,433 @@
 
 import aiosqlite
-import json
 import logging
-import aiosqlite
-import json
-import logging
-from datetime import datetime
+
+import orjson
+from collections import Counter
+from datetime import datetime, timezone
 
 log = logging.getLogger(__name__)
 
 DB_PATH = "feedybot.db"
 
 
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat()
+
+_conn = None
+
+
+async def get_conn():
+    """Return the shared connection, opening it on first use"""
+    global _conn
+
+    if _conn is None:
+        _conn = await aiosqlite.connect(DB_PATH)
+
+        await _conn.execute("PRAGMA journal_mode=WAL")
+        await _conn.execute("PRAGMA synchronous=NORMAL")
+        await _conn.execute("PRAGMA wal_autocheckpoint=1000")
+        await _conn.execute("PRAGMA mmap_size=134217728")
+        await _conn.execute("PRAGMA temp_store=MEMORY")
+        await _conn.execute("PRAGMA foreign_keys=ON")
+        await _conn.execute("PRAGMA cache_size=-20000")
+
+        log.info("Opened shared database connection")
+
+    return _conn
+
+
+async def close_db():
+
+    global _conn
+
+    if _conn is not None:
+        await _conn.close()
+        _conn = None
+        log.info("Closed shared database connection")
+
+
 async def init_db():
-    
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Users table - stores user subscriptions
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                uid INTEGER PRIMARY KEY,
-                uname TEXT NOT NULL,
-                cats TEXT NOT NULL,
-                keywords TEXT DEFAULT '[]',
-                created_at TEXT NOT NULL
-            )
-        """)
-        
-        
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cat TEXT UNIQUE NOT NULL,
-                created_at TEXT NOT NULL
-            )
-        """)
-        
-        
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS feeds (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cat TEXT NOT NULL,
-                url TEXT NOT NULL,
-                added_at TEXT NOT NULL,
-                UNIQUE(cat, url),
-                FOREIGN KEY (cat) REFERENCES categories(cat) ON DELETE CASCADE
-            )
-        """)
-        
-    
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS last_seen (
-                url TEXT PRIMARY KEY,
-                last_entry_id TEXT NOT NULL,
-                last_checked TEXT NOT NULL
-            )
-        """)
-        
-        
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS unread_posts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                uid INTEGER NOT NULL,
-                cat TEXT NOT NULL,
-                title TEXT NOT NULL,
-                link TEXT NOT NULL,
-                published TEXT,
-                summary TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (uid) REFERENCES users(uid) ON DELETE CASCADE
-            )
-        """)
-        
-        await db.commit()
-        log.info("Database initialized successfully")
+
+    db = await get_conn()
+
+    # Users table - stores user subscriptions. The cats/keywords JSON
+    # columns are legacy; user_cats/user_keywords are the source of truth
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            uid INTEGER PRIMARY KEY,
+            uname TEXT NOT NULL,
+            cats TEXT NOT NULL,
+            keywords TEXT DEFAULT '[]',
+            created_at TEXT NOT NULL
+        )
+    """)
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS user_cats (
+            uid INTEGER NOT NULL,
+            cat TEXT NOT NULL,
+            PRIMARY KEY (uid, cat)
+        )
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_user_cats_cat ON user_cats(cat)")
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS user_keywords (
+            uid INTEGER NOT NULL,
+            keyword TEXT NOT NULL,
+            PRIMARY KEY (uid, keyword)
+        )
+    """)
+
+    # One-time migration of the old JSON array columns into the side tables.
+    # Gated on user_version (not on the tables being empty) so a user
+    # clearing all their subscriptions doesn't get them resurrected from
+    # the stale JSON on the next restart
+    async with db.execute("PRAGMA user_version") as cursor:
+        schema_version = (await cursor.fetchone())[0]
+    if schema_version < 1:
+        async with db.execute("SELECT uid, cats, keywords FROM users") as cursor:
+            rows = await cursor.fetchall()
+        for uid, cats, keywords in rows:
+            for cat in orjson.loads(cats or "[]"):
+                await db.execute(
+                    "INSERT OR IGNORE INTO user_cats (uid, cat) VALUES (?, ?)",
+                    (uid, cat))
+            for kw in orjson.loads(keywords or "[]"):
+                await db.execute(
+                    "INSERT OR IGNORE INTO user_keywords (uid, keyword) VALUES (?, ?)",
+                    (uid, kw))
+        # Blank the legacy columns too - the side tables own this data now
+        await db.execute("UPDATE users SET cats = '[]', keywords = '[]'")
+        await db.execute("PRAGMA user_version = 1")
+
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cat TEXT UNIQUE NOT NULL,
+            created_at TEXT NOT NULL
+        )
+    """)
+
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS feeds (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cat TEXT NOT NULL,
+            url TEXT NOT NULL,
+            added_at TEXT NOT NULL,
+            UNIQUE(cat, url),
+            FOREIGN KEY (cat) REFERENCES categories(cat) ON DELETE CASCADE
+        )
+    """)
+
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS last_seen (
+            url TEXT PRIMARY KEY,
+            last_entry_id TEXT NOT NULL,
+            last_checked TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT
+        )
+    """)
+
+    # Migrate databases created before the conditional-GET columns
+    for col in ("etag", "last_modified"):
+        try:
+            await db.execute(f"ALTER TABLE last_seen ADD COLUMN {col} TEXT")
+        except Exception:
+            pass
+
+
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS unread_posts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            uid INTEGER NOT NULL,
+            cat TEXT NOT NULL,
+            title TEXT NOT NULL,
+            link TEXT NOT NULL,
+            published TEXT,
+            summary TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (uid) REFERENCES users(uid) ON DELETE CASCADE
+        )
+    """)
+
+    # Index the hot lookups: unread posts by user (and category) newest-first,
+    # and feed lists by category
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_unread_uid_cat_created
+        ON unread_posts(uid, cat, created_at DESC)
+    """)
+    await db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_unread_uid_created
+        ON unread_posts(uid, created_at DESC)
+    """)
+    await db.execute("CREATE INDEX IF NOT EXISTS idx_feeds_cat ON feeds(cat)")
+
+    await db.commit()
+    log.info("Database initialized successfully")
 
 
 
 
 async def add_user(uid, uname, cats = None):
-    
+
     if cats is None:
         cats = []
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO users (uid, uname, cats, created_at)
-                VALUES (?, ?, ?, ?)
-            """, (uid, uname, json.dumps(cats), datetime.utcnow().isoformat()))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("""
+            INSERT OR REPLACE INTO users (uid, uname, cats, created_at)
+            VALUES (?, ?, '[]', ?)
+        """, (uid, uname, _now_iso()))
+        await db.execute("DELETE FROM user_cats WHERE uid = ?", (uid,))
+        await db.executemany("""
+            INSERT OR IGNORE INTO user_cats (uid, cat) VALUES (?, ?)
+        """, [(uid, cat) for cat in cats])
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error adding user {uid}: {e}")
         return False
 
 
 async def get_user(uid):
-   
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM users WHERE uid = ?", (uid,)) as cursor:
-                row = await cursor.fetchone()
-                if row:
-                    return {
-                        "uid": row["uid"],
-                        "uname": row["uname"],
-                        "cats": json.loads(row["cats"]),
-                        "keywords": json.loads(row["keywords"]) if row["keywords"] else [],
-                        "created_at": row["created_at"]
-                    }
+        db = await get_conn()
+        async with db.execute("""
+            SELECT uid, uname, created_at FROM users WHERE uid = ?
+        """, (uid,)) as cursor:
+            row = await cursor.fetchone()
+        if row:
+            async with db.execute("""
+                SELECT cat FROM user_cats WHERE uid = ?
+            """, (uid,)) as cursor:
+                cats = [r[0] for r in await cursor.fetchall()]
+            async with db.execute("""
+                SELECT keyword FROM user_keywords WHERE uid = ?
+            """, (uid,)) as cursor:
+                keywords = [r[0] for r in await cursor.fetchall()]
+            uid, uname, created_at = row
+            return {
+                "uid": uid,
+                "uname": uname,
+                "cats": cats,
+                "keywords": keywords,
+                "created_at": created_at
+            }
     except Exception as e:
         log.error(f"Error getting user {uid}: {e}")
     return None
 
 
 async def update_user_subscriptions(uid, categories):
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                UPDATE users SET cats = ? WHERE uid = ?
-            """, (json.dumps(categories), uid))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("DELETE FROM user_cats WHERE uid = ?", (uid,))
+        await db.executemany("""
+            INSERT OR IGNORE INTO user_cats (uid, cat) VALUES (?, ?)
+        """, [(uid, cat) for cat in categories])
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error updating subscriptions for {uid}: {e}")
         return False
 
 
 async def add_user_keyword(uid, keyword):
-    
+
     try:
-        user = await get_user(uid)
-        if not user:
-            return False
-        
-        keywords = user.get("keywords", [])
-        if keyword.lower() not in [k.lower() for k in keywords]:
-            keywords.append(keyword.lower())
-            
-            async with aiosqlite.connect(DB_PATH) as db:
-                await db.execute("""
-                    UPDATE users SET keywords = ? WHERE uid = ?
-                """, (json.dumps(keywords), uid))
-                await db.commit()
+        kw = keyword.lower()
+
+        db = await get_conn()
+        await db.execute("""
+            INSERT OR IGNORE INTO user_keywords (uid, keyword) VALUES (?, ?)
+        """, (uid, kw))
+        await db.commit()
         return True
     except Exception as e:
         log.error(f"Error adding keyword for {uid}: {e}")
         return False
 
 
+async def user_exists(uid):
+    """Existence check without pulling cats/keywords"""
+    try:
+        db = await get_conn()
+        async with db.execute("""
+            SELECT 1 FROM users WHERE uid = ? LIMIT 1
+        """, (uid,)) as cursor:
+            return await cursor.fetchone() is not None
+    except Exception as e:
+        log.error(f"Error checking user {uid}: {e}")
+        return False
+
+
+async def add_user_cat(uid, cat):
+    """Subscribe one user to one category - a single indexed upsert"""
+    try:
+        db = await get_conn()
+        await db.execute("""
+            INSERT OR IGNORE INTO user_cats (uid, cat) VALUES (?, ?)
+        """, (uid, cat))
+        await db.commit()
+        return True
+    except Exception as e:
+        log.error(f"Error adding cat {cat} for user {uid}: {e}")
+        return False
+
+
+async def remove_user_cat(uid, cat):
+
+    try:
+        db = await get_conn()
+        await db.execute("""
+            DELETE FROM user_cats WHERE uid = ? AND cat = ?
+        """, (uid, cat))
+        await db.commit()
+        return True
+    except Exception as e:
+        log.error(f"Error removing cat {cat} for user {uid}: {e}")
+        return False
+
+
 async def get_all_users():
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM users") as cursor:
-                rows = await cursor.fetchall()
-                return [{
-                    "uid": row["uid"],
-                    "uname": row["uname"],
-                    "cats": json.loads(row["cats"]),
-                    "keywords": json.loads(row["keywords"]) if row["keywords"] else []
-                } for row in rows]
+        db = await get_conn()
+        async with db.execute("SELECT uid, uname FROM users") as cursor:
+            rows = await cursor.fetchall()
+
+        users = {uid: {
+            "uid": uid,
+            "uname": uname,
+            "cats": [],
+            "keywords": []
+        } for uid, uname in rows}
+
+        async with db.execute("SELECT uid, cat FROM user_cats") as cursor:
+            for uid, cat in await cursor.fetchall():
+                if uid in users:
+                    users[uid]["cats"].append(cat)
+        async with db.execute("SELECT uid, keyword FROM user_keywords") as cursor:
+            for uid, kw in await cursor.fetchall():
+                if uid in users:
+                    users[uid]["keywords"].append(kw)
+
+        return list(users.values())
     except Exception as e:
         log.error(f"Error getting all users: {e}")
         return []
 
 
+async def get_active_users():
+    """Users subscribed to at least one category, with cats and keywords"""
+    try:
+        db = await get_conn()
+        async with db.execute("""
+            SELECT uid, uname FROM users
+            WHERE uid IN (SELECT DISTINCT uid FROM user_cats)
+        """) as cursor:
+            rows = await cursor.fetchall()
+
+        users = {uid: {
+            "uid": uid,
+            "uname": uname,
+            "cats": [],
+            "keywords": []
+        } for uid, uname in rows}
+
+        async with db.execute("SELECT uid, cat FROM user_cats") as cursor:
+            for uid, cat in await cursor.fetchall():
+                if uid in users:
+                    users[uid]["cats"].append(cat)
+        async with db.execute("SELECT uid, keyword FROM user_keywords") as cursor:
+            for uid, kw in await cursor.fetchall():
+                if uid in users:
+                    users[uid]["keywords"].append(kw)
+
+        return list(users.values())
+    except Exception as e:
+        log.error(f"Error getting active users: {e}")
+        return []
+
+
+async def get_users_by_cat(cat):
+    """Subscribers of one category via the user_cats index, with keywords"""
+    try:
+        db = await get_conn()
+        async with db.execute("""
+            SELECT u.uid, u.uname FROM users u
+            JOIN user_cats uc ON uc.uid = u.uid
+            WHERE uc.cat = ?
+        """, (cat,)) as cursor:
+            rows = await cursor.fetchall()
+
+        users = {uid: {
+            "uid": uid,
+            "uname": uname,
+            "cats": [cat],
+            "keywords": []
+        } for uid, uname in rows}
+
+        if users:
+            marks = ",".join("?" * len(users))
+            async with db.execute(f"""
+                SELECT uid, keyword FROM user_keywords WHERE uid IN ({marks})
+            """, tuple(users)) as cursor:
+                for uid, kw in await cursor.fetchall():
+                    users[uid]["keywords"].append(kw)
+
+        return list(users.values())
+    except Exception as e:
+        log.error(f"Error getting users for cat {cat}: {e}")
+        return []
+
+
 
 
 async def add_category(cat):
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                INSERT OR IGNORE INTO categories (cat, created_at)
-                VALUES (?, ?)
-            """, (cat, datetime.utcnow().isoformat()))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("""
+            INSERT OR IGNORE INTO categories (cat, created_at)
+            VALUES (?, ?)
+        """, (cat, _now_iso()))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error adding category {cat}: {e}")
         return False
 
 
 async def get_all_categories():
-   
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute("SELECT cat FROM categories ORDER BY cat") as cursor:
-                rows = await cursor.fetchall()
-                return [row[0] for row in rows]
+        db = await get_conn()
+        async with db.execute("SELECT cat FROM categories ORDER BY cat") as cursor:
+            rows = await cursor.fetchall()
+            return [row[0] for row in rows]
     except Exception as e:
         log.error(f"Error getting categories: {e}")
         return []
 
 
 async def delete_category(cat):
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("DELETE FROM feeds WHERE cat = ?", (cat,))
-            await db.execute("DELETE FROM categories WHERE cat = ?", (cat,))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("DELETE FROM feeds WHERE cat = ?", (cat,))
+        await db.execute("DELETE FROM categories WHERE cat = ?", (cat,))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error deleting category {cat}: {e}")
         return False
@@ -214,59 +436,75 @@ async def delete_category(cat):
 
 
 async def add_feed(cat, url):
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            # Ensure category exists
-            await add_category(cat)
-            
-            await db.execute("""
-                INSERT OR IGNORE INTO feeds (cat, url, added_at)
-                VALUES (?, ?, ?)
-            """, (cat, url, datetime.utcnow().isoformat()))
-            await db.commit()
-            return True
+        db = await get_conn()
+        now = _now_iso()
+
+        # Ensure the category exists and add the feed in one transaction
+        await db.execute("""
+            INSERT OR IGNORE INTO categories (cat, created_at)
+            VALUES (?, ?)
+        """, (cat, now))
+        await db.execute("""
+            INSERT OR IGNORE INTO feeds (cat, url, added_at)
+            VALUES (?, ?, ?)
+        """, (cat, url, now))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error adding feed {url} to {cat}: {e}")
         return False
 
 
 async def remove_feed(cat, url):
-    
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                DELETE FROM feeds WHERE cat = ? AND url = ?
-            """, (cat, url))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("""
+            DELETE FROM feeds WHERE cat = ? AND url = ?
+        """, (cat, url))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error removing feed {url} from {cat}: {e}")
         return False
 
 
-async def get_feeds_by_category(cat):
-   
+async def get_feeds_by_cats(cats):
+    """Feed urls for many categories in one query, as {cat: [urls]}"""
+    if not cats:
+        return {}
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute("""
-                SELECT url FROM feeds WHERE cat = ?
-            """, (cat,)) as cursor:
-                rows = await cursor.fetchall()
-                return [row[0] for row in rows]
+        db = await get_conn()
+        marks = ",".join("?" * len(cats))
+        async with db.execute(f"""
+            SELECT cat, url FROM feeds WHERE cat IN ({marks})
+        """, tuple(cats)) as cursor:
+            rows = await cursor.fetchall()
+
+        feeds = {}
+        for cat, url in rows:
+            feeds.setdefault(cat, []).append(url)
+        return feeds
     except Exception as e:
-        log.error(f"Error getting feeds for {cat}: {e}")
+        log.error(f"Error getting feeds for cats {cats}: {e}")
+        return {}
 
 
-        return []
+async def get_feeds_by_category(cat):
+
+    feeds = await get_feeds_by_cats([cat])
+    return feeds.get(cat, [])
 
 
 async def get_all_feeds():
-  
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute("SELECT cat, url FROM feeds") as cursor:
-                return await cursor.fetchall()
+        db = await get_conn()
+        async with db.execute("SELECT cat, url FROM feeds ORDER BY cat") as cursor:
+            return await cursor.fetchall()
     except Exception as e:
         log.error(f"Error getting all feeds: {e}")
         return []
@@ -274,122 +512,220 @@ async def get_all_feeds():
 
 
 
-async def update_last_seen(url, entry_id):
-   
+async def update_last_seen(url, entry_id, commit=True):
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                INSERT OR REPLACE INTO last_seen (url, last_entry_id, last_checked)
-                VALUES (?, ?, ?)
-            """, (url, entry_id, datetime.utcnow().isoformat()))
+        db = await get_conn()
+        # Upsert rather than OR REPLACE so the etag/last_modified
+        # validators survive entry-id updates. Callers that follow up
+        # with a bulk write pass commit=False to share one fsync
+        await db.execute("""
+            INSERT INTO last_seen (url, last_entry_id, last_checked)
+            VALUES (?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                last_entry_id = excluded.last_entry_id,
+                last_checked = excluded.last_checked
+        """, (url, entry_id, _now_iso()))
+        if commit:
             await db.commit()
-            return True
+        return True
     except Exception as e:
         log.error(f"Error updating last seen for {url}: {e}")
         return False
 
 
+async def get_last_seen_map():
+    """All feeds' last-seen entry ids in one query, keyed by url"""
+    try:
+        db = await get_conn()
+        async with db.execute("SELECT url, last_entry_id FROM last_seen") as cursor:
+            rows = await cursor.fetchall()
+            return {row[0]: (row[1] or None) for row in rows}
+    except Exception as e:
+        log.error(f"Error getting last seen map: {e}")
+        return {}
+
+
 async def get_last_seen(url):
-   
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute("""
-                SELECT last_entry_id FROM last_seen WHERE url = ?
-            """, (url,)) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else None
+        db = await get_conn()
+        async with db.execute("""
+            SELECT last_entry_id FROM last_seen WHERE url = ?
+        """, (url,)) as cursor:
+            row = await cursor.fetchone()
+            return (row[0] or None) if row else None
     except Exception as e:
         log.error(f"Error getting last seen for {url}: {e}")
         return None
 
 
+async def get_feed_http_cache(url):
+    """Return the stored (etag, last_modified) validators for a feed"""
+    try:
+        db = await get_conn()
+        async with db.execute("""
+            SELECT etag, last_modified FROM last_seen WHERE url = ?
+        """, (url,)) as cursor:
+            row = await cursor.fetchone()
+            return (row[0], row[1]) if row else (None, None)
+    except Exception as e:
+        log.error(f"Error getting HTTP cache for {url}: {e}")
+        return (None, None)
+
+
+async def set_feed_http_cache(url, etag, last_modified):
+
+    try:
+        db = await get_conn()
+        await db.execute("""
+            INSERT INTO last_seen (url, last_entry_id, last_checked, etag, last_modified)
+            VALUES (?, '', ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                last_checked = excluded.last_checked
+        """, (url, _now_iso(), etag, last_modified))
+        await db.commit()
+        return True
+    except Exception as e:
+        log.error(f"Error setting HTTP cache for {url}: {e}")
+        return False
+
+
 
 
-async def add_unread_post(uid, cat, title, link, 
+async def add_unread_post(uid, cat, title, link,
                          published = None, summary = None):
-  
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("""
-                INSERT INTO unread_posts (uid, cat, title, link, published, summary, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (uid, cat, title, link, published, summary, datetime.utcnow().isoformat()))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("""
+            INSERT INTO unread_posts (uid, cat, title, link, published, summary, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (uid, cat, title, link, published, summary, _now_iso()))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error adding unread post for user {uid}: {e}")
         return False
 
 
+async def add_unread_posts_bulk(rows):
+    """Insert many (uid, cat, title, link, published, summary, created_at) rows in one transaction"""
+    if not rows:
+        return True
+
+    try:
+        db = await get_conn()
+        await db.executemany("""
+            INSERT INTO unread_posts (uid, cat, title, link, published, summary, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        await db.commit()
+        return True
+    except Exception as e:
+        log.error(f"Error bulk-adding {len(rows)} unread posts: {e}")
+        return False
+
+
 async def get_unread_posts(uid, limit = 50):
-  
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM unread_posts 
-                WHERE uid = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            """, (uid, limit)) as cursor:
-                rows = await cursor.fetchall()
-                return [{
-                    "id": row["id"],
-                    "cat": row["cat"],
-                    "title": row["title"],
-                    "link": row["link"],
-                    "published": row["published"],
-                    "summary": row["summary"],
-                    "created_at": row["created_at"]
-                } for row in rows]
+        db = await get_conn()
+        async with db.execute("""
+            SELECT id, cat, title, link, published, summary, created_at
+            FROM unread_posts
+            WHERE uid = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """, (uid, limit)) as cursor:
+            rows = await cursor.fetchall()
+            return [{
+                "id": post_id,
+                "cat": cat,
+                "title": title,
+                "link": link,
+                "published": published,
+                "summary": summary,
+                "created_at": created_at
+            } for post_id, cat, title, link, published, summary, created_at in rows]
     except Exception as e:
         log.error(f"Error getting unread posts for {uid}: {e}")
         return []
 
 
+async def get_unread_posts_with_counts(uid, limit = 50):
+
+    posts = await get_unread_posts(uid, limit)
+    counts = Counter(post["cat"] for post in posts)
+    return posts, counts
+
+
 async def clear_unread_posts(uid):
-   
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("DELETE FROM unread_posts WHERE uid = ?", (uid,))
-            await db.commit()
-            return True
+        db = await get_conn()
+        await db.execute("DELETE FROM unread_posts WHERE uid = ?", (uid,))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error clearing unread posts for {uid}: {e}")
         return False
 
 
 async def get_unread_count(uid) -> int:
- 
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            async with db.execute("""
-                SELECT COUNT(*) FROM unread_posts WHERE uid = ?
-            """, (uid,)) as cursor:
-                row = await cursor.fetchone()
-                return row[0] if row else 0
+        db = await get_conn()
+        async with db.execute("""
+            SELECT COUNT(*) FROM unread_posts WHERE uid = ?
+        """, (uid,)) as cursor:
+            row = await cursor.fetchone()
+            return row[0] if row else 0
     except Exception as e:
         log.error(f"Error getting unread count for {uid}: {e}")
         return 0
 
 
+async def trim_unread_posts_bulk(cat, limit=10):
+    """Trim every user's unread posts in a category to the newest `limit` rows"""
+    try:
+        db = await get_conn()
+        await db.execute("""
+            DELETE FROM unread_posts WHERE cat = ? AND id IN (
+                SELECT id FROM (
+                    SELECT id, ROW_NUMBER() OVER (
+                        PARTITION BY uid ORDER BY created_at DESC
+                    ) AS rn
+                    FROM unread_posts WHERE cat = ?
+                ) WHERE rn > ?
+            )
+        """, (cat, cat, limit))
+        await db.commit()
+        return True
+    except Exception as e:
+        log.error(f"Error bulk-trimming unread posts for {cat}: {e}")
+        return False
+
+
 async def trim_unread_posts(uid, cat, limit=10):
-   
+
     try:
-        async with aiosqlite.connect(DB_PATH) as db:
-            # Delete older posts beyond the limit
-            await db.execute("""
-                DELETE FROM unread_posts 
-                WHERE uid = ? AND cat = ? 
-                AND id NOT IN (
-                    SELECT id FROM unread_posts 
-                    WHERE uid = ? AND cat = ?
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                )
-            """, (uid, cat, uid, cat, limit))
-            await db.commit()
-            return True
+        db = await get_conn()
+        # Delete older posts beyond the limit
+        await db.execute("""
+            DELETE FROM unread_posts
+            WHERE uid = ? AND cat = ?
+            AND id NOT IN (
+                SELECT id FROM unread_posts
+                WHERE uid = ? AND cat = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            )
+        """, (uid, cat, uid, cat, limit))
+        await db.commit()
+        return True
     except Exception as e:
         log.error(f"Error trimming unread posts for {uid}, {cat}: {e}")
         return False
@@ -3,7 +3,9 @@ import feedparser
 import aiohttp
 import logging
 from typing import List, Dict, Optional, Tuple
-from datetime import datetime
+from datetime import datetime, timezone
+from itertools import groupby
+from urllib.parse import urlparse
 import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -17,22 +19,110 @@ logger = logging.getLogger(__name__)
 
 scheduler: Optional[AsyncIOScheduler] = None
 
+FEED_CONCURRENCY = 10
+PER_HOST_CONCURRENCY = 2
+DM_CONCURRENCY = 5
 
-async def fetch_feed(feed_url: str, timeout: int = 30) -> Optional[feedparser.FeedParserDict]:
+_host_sems: Dict[str, asyncio.Semaphore] = {}
+
+_user_objs: Dict[int, object] = {}
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Shared HTTP session with keep-alive, pooling and DNS caching"""
+    global _session
+
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=4, ttl_dns_cache=300),
+            headers={"Accept-Encoding": "gzip", "User-Agent": "FeedyBot/1.0"}
+        )
+        logger.info("Opened shared HTTP session")
+
+    return _session
+
+
+async def close_session():
+
+    global _session
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+        _session = None
+        logger.info("Closed shared HTTP session")
+
+
+def _host_sem(url: str) -> asyncio.Semaphore:
+    """Politeness limit per feed host instead of a global sleep"""
+    host = urlparse(url).netloc
+    sem = _host_sems.get(host)
+    if sem is None:
+        sem = asyncio.Semaphore(PER_HOST_CONCURRENCY)
+        _host_sems[host] = sem
+    return sem
+
+
+async def _get_discord_user(bot, user_id: int):
+    """Resolve a Discord user without a REST call when possible.
+
+    Checks our cache, then discord.py's gateway cache, and only falls
+    back to the rate-limited fetch_user endpoint for cold IDs.
+    """
+    user = _user_objs.get(user_id)
+    if user is None:
+        user = bot.get_user(user_id) or await bot.fetch_user(user_id)
+        _user_objs[user_id] = user
+    return user
+
+
+# Sentinel returned by fetch_feed when the server answers 304 Not Modified
+NOT_MODIFIED = object()
+
+
+async def fetch_feed(feed_url: str, timeout: int = 30,
+                     use_cache: bool = True) -> Optional[feedparser.FeedParserDict]:
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(feed_url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    feed = feedparser.parse(content)
-                    
-                    if feed.bozo:  
-                        logger.warning(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
-                    
-                    return feed
-                else:
-                    logger.error(f"Failed to fetch {feed_url}: HTTP {response.status}")
-                    return None
+        session = await get_session()
+
+        # Callers that need the current content regardless of newness
+        # (previews, validation) pass use_cache=False to skip the
+        # conditional-GET validators and the 304 short-circuit
+        headers = {}
+        if use_cache:
+            etag, last_modified = await db.get_feed_http_cache(feed_url)
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+        async with session.get(feed_url, timeout=aiohttp.ClientTimeout(total=timeout),
+                               headers=headers) as response:
+            if response.status == 304:
+                logger.debug(f"Feed not modified: {feed_url}")
+                return NOT_MODIFIED
+
+            if response.status == 200:
+                content = await response.text()
+                # feedparser is pure-CPU and can take hundreds of ms on big
+                # feeds - run it in a worker thread so the loop keeps serving
+                loop = asyncio.get_running_loop()
+                feed = await loop.run_in_executor(None, feedparser.parse, content)
+
+                if feed.bozo:
+                    logger.warning(f"Feed parsing warning for {feed_url}: {feed.bozo_exception}")
+
+                await db.set_feed_http_cache(
+                    feed_url,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified")
+                )
+
+                return feed
+            else:
+                logger.error(f"Failed to fetch {feed_url}: HTTP {response.status}")
+                return None
     except asyncio.TimeoutError:
         logger.error(f"Timeout fetching {feed_url}")
         return None
@@ -45,11 +135,16 @@ def get_entry_id(entry: Dict) -> str:
     return entry.get("id") or entry.get("link") or entry.get("title", "unknown")
 
 
-async def get_new_entries(feed_url: str, feed: feedparser.FeedParserDict) -> List[Dict]:
+async def get_new_entries(feed_url: str, feed: feedparser.FeedParserDict,
+                          last_seen_map: Dict[str, str] = None) -> List[Dict]:
 
     try:
-        last_seen_id = await db.get_last_seen(feed_url)
-        
+        # A preloaded map (one SELECT per tick) beats one SELECT per feed
+        if last_seen_map is not None:
+            last_seen_id = last_seen_map.get(feed_url)
+        else:
+            last_seen_id = await db.get_last_seen(feed_url)
+
         if not feed.entries:
             return []
         
@@ -76,8 +171,10 @@ async def get_new_entries(feed_url: str, feed: feedparser.FeedParserDict) -> Lis
         
         
         if latest_id and new_entries:
-            await db.update_last_seen(feed_url, latest_id)
-        
+            # Committed together with the unread-post bulk insert that
+            # process_feed issues right after
+            await db.update_last_seen(feed_url, latest_id, commit=False)
+
         return new_entries
     
     except Exception as e:
@@ -85,16 +182,46 @@ async def get_new_entries(feed_url: str, feed: feedparser.FeedParserDict) -> Lis
         return []
 
 
-async def process_feed(category: str, feed_url: str, bot_instance=None) -> int:
-  
+def _clean_summaries(raw_summaries: List[str]) -> List[str]:
+    """Strip HTML from a whole feed's summaries in one executor hop"""
+    return [utils.clean_html(raw) for raw in raw_summaries]
+
+
+def _eligible_user_ids(users: List[Dict], title: str, summary: str) -> set:
+    """Match an entry against each distinct keyword set once, not per user"""
+    content = f"{title} {summary}".lower()
+
+    eligible = set()
+    checked = {}
+
+    for user in users:
+        kws = frozenset(k.lower() for k in user.get("keywords", []))
+
+        ok = checked.get(kws)
+        if ok is None:
+            ok = user_manager.content_matches(kws, content)
+            checked[kws] = ok
+
+        if ok:
+            eligible.add(user["uid"])
+
+    return eligible
+
+
+async def process_feed(category: str, feed_url: str, bot_instance=None,
+                       last_seen_map: Dict[str, str] = None) -> int:
+
     try:
         logger.info(f"Processing feed: {feed_url} ({category})")
-        
+
         feed = await fetch_feed(feed_url)
+        if feed is NOT_MODIFIED:
+            logger.debug(f"No changes for {feed_url} (304)")
+            return 0
         if not feed:
             return 0
-        
-        new_entries = await get_new_entries(feed_url, feed)
+
+        new_entries = await get_new_entries(feed_url, feed, last_seen_map)
         
         if not new_entries:
             logger.debug(f"No new entries for {feed_url}")
@@ -104,36 +231,31 @@ async def process_feed(category: str, feed_url: str, bot_instance=None) -> int:
         
         
         users = await user_manager.get_users_by_category(category)
-        
-    
-        for entry in reversed(new_entries):  
+
+        now_dt = datetime.now(timezone.utc)
+        now = now_dt.isoformat()
+        rows = []
+
+        entries = list(reversed(new_entries))
+        loop = asyncio.get_running_loop()
+        summaries = await loop.run_in_executor(None, _clean_summaries, [
+            entry.get("summary", entry.get("description", "")) for entry in entries
+        ])
+
+        for entry, summary in zip(entries, summaries):
             title = entry.get("title", "No title")
             link = entry.get("link", "")
-            summary = utils.clean_html(entry.get("summary", entry.get("description", "")))
             published = entry.get("published", entry.get("updated", ""))
-            
-            
+
+
             thumbnail_url = utils.get_entry_thumbnail(entry)
-            
-            
-            for user in users:
-                user_id = user["user_id"]
-                
-                
-                if await user_manager.should_show_post(user_id, title, summary):
-                    await db.add_unread_post(
-                        uid=user_id,
-                        cat=category,
-                        title=title,
-                        link=link,
-                        published=published,
-                        summary=summary
-                    )
-                    
-                    
-                    await db.trim_unread_posts(user_id, category, limit=10)
-            
-            
+
+
+            eligible_ids = _eligible_user_ids(users, title, summary)
+            for user_id in eligible_ids:
+                rows.append((user_id, category, title, link, published, summary, now))
+
+
             if bot_instance:
                 await post_entry_to_discord(
                     bot=bot_instance,
@@ -143,9 +265,15 @@ async def process_feed(category: str, feed_url: str, bot_instance=None) -> int:
                     summary=summary,
                     published=published,
                     thumbnail_url=thumbnail_url,
-                    users=users
+                    users=users,
+                    eligible_ids=eligible_ids,
+                    now=now_dt
                 )
-        
+
+
+        await db.add_unread_posts_bulk(rows)
+        await db.trim_unread_posts_bulk(category, limit=10)
+
         return len(new_entries)
     
     except Exception as e:
@@ -153,35 +281,48 @@ async def process_feed(category: str, feed_url: str, bot_instance=None) -> int:
         return 0
 
 
-async def post_entry_to_discord(bot, category: str, title: str, link: str, 
+async def post_entry_to_discord(bot, category: str, title: str, link: str,
                                 summary: str, published: str, thumbnail_url: str,
-                                users: List[Dict]):
-   
+                                users: List[Dict], eligible_ids: set = None,
+                                now: datetime = None):
+
     try:
+        # One embed per entry, shared across every recipient
         embed = utils.create_feed_embed(
             title=title,
             link=link,
             description=summary,
             category=category,
             published=published,
-            thumbnail_url=thumbnail_url
+            thumbnail_url=thumbnail_url,
+            now=now
         )
-        
-        
+
+        recipients = []
         for user in users:
-            user_id = user["user_id"]
-            
-            
-            if not await user_manager.should_show_post(user_id, title, summary):
+            user_id = user["uid"]
+
+            if eligible_ids is not None:
+                if user_id not in eligible_ids:
+                    continue
+            elif not await user_manager.should_show_post(user_id, title, summary):
                 continue
-            
-            try:
-                discord_user = await bot.fetch_user(user_id)
-                await discord_user.send(embed=embed)
-                logger.debug(f"Sent post to user {user_id}")
-            except Exception as e:
-                logger.error(f"Failed to send DM to user {user_id}: {e}")
-    
+
+            recipients.append(user_id)
+
+        sem = asyncio.Semaphore(DM_CONCURRENCY)
+
+        async def _send(user_id):
+            async with sem:
+                try:
+                    discord_user = await _get_discord_user(bot, user_id)
+                    await discord_user.send(embed=embed)
+                    logger.debug(f"Sent post to user {user_id}")
+                except Exception as e:
+                    logger.error(f"Failed to send DM to user {user_id}: {e}")
+
+        await asyncio.gather(*[_send(user_id) for user_id in recipients])
+
     except Exception as e:
         logger.error(f"Error posting to Discord: {e}")
 
@@ -192,15 +333,30 @@ async def check_all_feeds(bot_instance=None):
         logger.info("Starting feed check cycle")
         
         all_feeds = await db.get_all_feeds()
+        last_seen_map = await db.get_last_seen_map()
+
+        # Warm the category -> subscribers cache with one scan for the
+        # whole tick
+        await user_manager.get_users_snapshot()
+
+        sem = asyncio.Semaphore(FEED_CONCURRENCY)
+
+        async def _one(cat, url):
+            async with sem, _host_sem(url):
+                return await process_feed(cat, url, bot_instance, last_seen_map)
+
+        results = await asyncio.gather(
+            *[_one(cat, url) for cat, url in all_feeds],
+            return_exceptions=True
+        )
+
         total_new = 0
-        
-        for category, feed_url in all_feeds:
-            new_count = await process_feed(category, feed_url, bot_instance)
-            total_new += new_count
-            
-            
-            await asyncio.sleep(1)
-        
+        for r in results:
+            if isinstance(r, Exception):
+                logger.error(f"Error processing feed: {r}")
+            else:
+                total_new += r
+
         logger.info(f"Feed check complete. Found {total_new} new entries across all feeds")
         
     except Exception as e:
@@ -291,15 +447,18 @@ async def manual_feed_check(category: str = None, feed_url: str = None, bot_inst
             }
         
         elif category:
-            
+
             feeds = await db.get_feeds_by_category(category)
-            total_new = 0
-            
-            for feed_url in feeds:
-                new_count = await process_feed(category, feed_url, bot_instance)
-                total_new += new_count
-                await asyncio.sleep(1)
-            
+
+            sem = asyncio.Semaphore(FEED_CONCURRENCY)
+
+            async def _one(url):
+                async with sem, _host_sem(url):
+                    return await process_feed(category, url, bot_instance)
+
+            results = await asyncio.gather(*[_one(url) for url in feeds], return_exceptions=True)
+            total_new = sum(r for r in results if isinstance(r, int))
+
             return {
                 "success": True,
                 "category": category,
@@ -322,8 +481,8 @@ async def send_latest_feed_preview(bot, user_id: int, category: str, feed_url: s
     try:
         logger.info(f"Sending preview from {feed_url} to user {user_id}")
         
-        feed = await fetch_feed(feed_url)
-        if not feed or not feed.entries:
+        feed = await fetch_feed(feed_url, use_cache=False)
+        if not feed or feed is NOT_MODIFIED or not feed.entries:
             logger.warning(f"No entries found in {feed_url}")
             return False
         
@@ -351,7 +510,7 @@ async def send_latest_feed_preview(bot, user_id: int, category: str, feed_url: s
         
         
         try:
-            discord_user = await bot.fetch_user(user_id)
+            discord_user = await _get_discord_user(bot, user_id)
             await discord_user.send(embed=embed)
             logger.info(f"Sent preview to user {user_id}")
             return True
@@ -367,19 +526,20 @@ async def send_latest_feed_preview(bot, user_id: int, category: str, feed_url: s
 async def send_category_previews(bot, user_id: int, categories: List[str]) -> int:
 
     try:
-        sent_count = 0
-        
+        sem = asyncio.Semaphore(FEED_CONCURRENCY)
+
+        async def _one(category, feed_url):
+            async with sem, _host_sem(feed_url):
+                return await send_latest_feed_preview(bot, user_id, category, feed_url)
+
+        tasks = []
         for category in categories:
             feeds = await db.get_feeds_by_category(category)
-            
-            for feed_url in feeds:
-                success = await send_latest_feed_preview(bot, user_id, category, feed_url)
-                if success:
-                    sent_count += 1
-                
-                
-                await asyncio.sleep(0.5)
-        
+            tasks.extend(_one(category, feed_url) for feed_url in feeds)
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        sent_count = sum(1 for r in results if r is True)
+
         logger.info(f"Sent {sent_count} previews to user {user_id}")
         return sent_count
     
@@ -394,9 +554,9 @@ async def validate_feed_url(feed_url: str) -> Tuple[bool, str]:
         if not utils.is_valid_url(feed_url):
             return False, "Invalid URL format"
         
-        feed = await fetch_feed(feed_url)
-        
-        if feed is None:
+        feed = await fetch_feed(feed_url, use_cache=False)
+
+        if feed is None or feed is NOT_MODIFIED:
             return False, "Could not fetch feed"
         
         if not hasattr(feed, 'entries'):
@@ -419,16 +579,14 @@ async def populate_initial_posts(bot_instance=None):
         
         
         all_feeds = await db.get_all_feeds()
-        
-        
-        feeds_by_cat = {}
-        for feed_info in all_feeds:
-            cat = feed_info[0]  
-            url = feed_info[1]
-            if cat not in feeds_by_cat:
-                feeds_by_cat[cat] = []
-            feeds_by_cat[cat].append(url)
-        
+
+        # Rows arrive sorted by cat, so one groupby pass builds the map
+        feeds_by_cat = {
+            cat: [url for _, url in group]
+            for cat, group in groupby(all_feeds, key=lambda row: row[0])
+        }
+
+
         total_posts = 0
         
         
@@ -440,37 +598,35 @@ async def populate_initial_posts(bot_instance=None):
             for url in feed_urls:
                 try:
                     feed = await fetch_feed(url)
-                    if not feed or not feed.entries:
+                    if feed is NOT_MODIFIED or not feed or not feed.entries:
                         continue
-                    
-                    
+
+
                     entries = feed.entries[:10]
-                    
-                    for ent in entries:
+
+                    now = datetime.now(timezone.utc).isoformat()
+                    rows = []
+
+                    loop = asyncio.get_running_loop()
+                    summaries = await loop.run_in_executor(None, _clean_summaries, [
+                        ent.get("summary", ent.get("description", "")) for ent in entries
+                    ])
+
+                    for ent, summary in zip(entries, summaries):
                         title = ent.get("title", "No title")
                         link = ent.get("link", "")
-                        summary = utils.clean_html(ent.get("summary", ent.get("description", "")))
                         published = ent.get("published", ent.get("updated", ""))
-                        
-                        
-                        for user in users:
-                            uid = user["user_id"]
-                            
-                            if await user_manager.should_show_post(uid, title, summary):
-                                await db.add_unread_post(
-                                    uid=uid,
-                                    cat=cat,
-                                    title=title,
-                                    link=link,
-                                    published=published,
-                                    summary=summary
-                                )
-                                total_posts += 1
-                        
-                        
-                        for user in users:
-                            await db.trim_unread_posts(user["user_id"], cat, limit=10)
-                
+
+
+                        for uid in _eligible_user_ids(users, title, summary):
+                            rows.append((uid, cat, title, link, published, summary, now))
+
+
+                    await db.add_unread_posts_bulk(rows)
+                    total_posts += len(rows)
+
+                    await db.trim_unread_posts_bulk(cat, limit=10)
+
                 except Exception as e:
                     logger.error(f"Error populating from {url}: {e}")
                     continue
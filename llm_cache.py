@@ -0,0 +1,82 @@
+
+import aiosqlite
+import hashlib
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+CACHE_DB_PATH = "llm_cache.db"
+DEFAULT_TTL = 4 * 60 * 60  # 4 hours
+
+
+stats = {"hits": 0, "misses": 0}
+
+
+def make_key(model, msgs):
+    """Build a deterministic cache key from the request payload"""
+    payload = json.dumps({"model": model, "msgs": msgs}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def init_cache():
+
+    try:
+        async with aiosqlite.connect(CACHE_DB_PATH) as db:
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    val TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+            await db.commit()
+    except Exception as e:
+        log.error(f"Error initializing LLM cache: {e}")
+
+
+async def get(key):
+
+    try:
+        async with aiosqlite.connect(CACHE_DB_PATH) as db:
+            async with db.execute("""
+                SELECT val, expires_at FROM llm_cache WHERE key = ?
+            """, (key,)) as cursor:
+                row = await cursor.fetchone()
+
+        if row and row[1] > time.time():
+            stats["hits"] += 1
+            _log_hit_rate()
+            return row[0]
+
+        stats["misses"] += 1
+        _log_hit_rate()
+        return None
+    except Exception as e:
+        log.error(f"Error reading LLM cache: {e}")
+        return None
+
+
+async def set(key, val, ttl=DEFAULT_TTL):
+
+    try:
+        async with aiosqlite.connect(CACHE_DB_PATH) as db:
+            await db.execute("""
+                INSERT OR REPLACE INTO llm_cache (key, val, expires_at)
+                VALUES (?, ?, ?)
+            """, (key, val, time.time() + ttl))
+
+            await db.execute("DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),))
+            await db.commit()
+            return True
+    except Exception as e:
+        log.error(f"Error writing LLM cache: {e}")
+        return False
+
+
+def _log_hit_rate():
+
+    total = stats["hits"] + stats["misses"]
+    if total and total % 50 == 0:
+        log.info(f"LLM cache hit rate: {stats['hits']}/{total} ({100 * stats['hits'] / total:.0f}%)")
@@ -0,0 +1,138 @@
+
+import asyncio
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+try:
+    import faiss
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+INDEX_PATH = "semantic_cache.index"
+RESPONSES_PATH = "semantic_cache_responses.txt"
+SIMILARITY_THRESHOLD = 0.95
+
+# Persist at most once per this many stores; flush() covers the rest
+PERSIST_EVERY = 20
+
+_encoder = None
+_index = None
+_responses = []
+_dirty = 0
+
+
+def _initialize_sync():
+    global _encoder, _index, _responses
+
+    try:
+        _encoder = SentenceTransformer("all-MiniLM-L6-v2")
+
+        if os.path.exists(INDEX_PATH) and os.path.exists(RESPONSES_PATH):
+            _index = faiss.read_index(INDEX_PATH)
+            with open(RESPONSES_PATH, "r") as f:
+                _responses = f.read().split("\n\x1e\n")
+        else:
+            _index = faiss.IndexFlatIP(_encoder.get_sentence_embedding_dimension())
+            _responses = []
+
+        log.info(f"Semantic cache initialized with {len(_responses)} entries")
+        return True
+    except Exception as e:
+        log.error(f"Error initializing semantic cache: {e}")
+        _encoder = None
+        _index = None
+        return False
+
+
+async def initialize():
+    """Load the encoder and any persisted index in a worker thread.
+
+    Model load can take seconds (or download on first run) - keep it
+    off the event loop so the gateway heartbeat isn't starved.
+    """
+    if not SEMANTIC_CACHE_AVAILABLE:
+        log.warning("sentence-transformers/faiss not installed - semantic cache disabled")
+        return False
+
+    return await asyncio.to_thread(_initialize_sync)
+
+
+def _embed(text):
+
+    emb = _encoder.encode([text], convert_to_numpy=True)
+    faiss.normalize_L2(emb)
+    return emb
+
+
+def _lookup_sync(prompt):
+
+    emb = _embed(prompt)
+    sims, ids = _index.search(emb, 1)
+
+    if sims[0][0] > SIMILARITY_THRESHOLD:
+        log.info(f"Semantic cache hit (similarity {sims[0][0]:.3f})")
+        return _responses[ids[0][0]]
+    return None
+
+
+async def lookup(prompt):
+    """Return a cached response for a semantically similar prompt, or None"""
+    if _encoder is None or _index is None or _index.ntotal == 0:
+        return None
+
+    try:
+        # Encoding is pure CPU - run it off the loop
+        return await asyncio.to_thread(_lookup_sync, prompt)
+    except Exception as e:
+        log.error(f"Error querying semantic cache: {e}")
+
+    return None
+
+
+def _persist_sync():
+
+    faiss.write_index(_index, INDEX_PATH)
+    with open(RESPONSES_PATH, "w") as f:
+        f.write("\n\x1e\n".join(_responses))
+
+
+def _store_sync(prompt, response):
+    global _dirty
+
+    _index.add(_embed(prompt))
+    _responses.append(response)
+
+    _dirty += 1
+    if _dirty >= PERSIST_EVERY:
+        _persist_sync()
+        _dirty = 0
+
+
+async def store(prompt, response):
+
+    if _encoder is None or _index is None:
+        return
+
+    try:
+        await asyncio.to_thread(_store_sync, prompt, response)
+    except Exception as e:
+        log.error(f"Error storing in semantic cache: {e}")
+
+
+async def flush():
+    """Persist any unsaved entries - called on shutdown"""
+    global _dirty
+
+    if _index is None or not _dirty:
+        return
+
+    try:
+        await asyncio.to_thread(_persist_sync)
+        _dirty = 0
+    except Exception as e:
+        log.error(f"Error flushing semantic cache: {e}")
@@ -1,10 +1,130 @@
 
+import asyncio
+import functools
 import logging
+import time
 
 import db
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 log = logging.getLogger(__name__)
 
+_automatons = {}
+
+
+def _get_automaton(kw_tuple):
+    auto = _automatons.get(kw_tuple)
+    if auto is None:
+        auto = ahocorasick.Automaton()
+        for kw in kw_tuple:
+            auto.add_word(kw, kw)
+        auto.make_automaton()
+        _automatons[kw_tuple] = auto
+    return auto
+
+
+@functools.lru_cache(maxsize=8192)
+def _match(kw_tuple, content):
+    if AHOCORASICK_AVAILABLE:
+        auto = _get_automaton(kw_tuple)
+        return next(auto.iter(content), None) is not None
+
+    return any(k in content for k in kw_tuple)
+
+
+def content_matches(keywords, content):
+    """True if any keyword occurs in (already lowercased) content.
+
+    With pyahocorasick installed this is one automaton pass over the
+    content instead of a substring scan per keyword. Automatons are
+    cached per keyword set; keyword changes yield a new set, so no
+    invalidation is needed. Decisions are memoized, so users sharing a
+    keyword set reuse the result for the same post.
+    """
+    kw_tuple = tuple(sorted(k.lower() for k in keywords))
+    if not kw_tuple:
+        return True
+
+    return _match(kw_tuple, content)
+
+USERS_BY_CAT_TTL = 60
+USER_CACHE_TTL = 30
+
+_users_by_cat = {}
+
+_user_cache = {}
+
+
+def _invalidate_user(uid):
+    _user_cache.pop(uid, None)
+
+
+async def _get_user_cached(uid):
+    """db.get_user with a short TTL so delivery passes reuse one fetch"""
+    now = time.monotonic()
+    cached = _user_cache.get(uid)
+    if cached and now - cached[0] <= USER_CACHE_TTL:
+        return cached[1]
+
+    user = await db.get_user(uid)
+    _user_cache[uid] = (now, user)
+    return user
+
+
+def _invalidate_users_by_cat(cats=None):
+    """Drop only the affected categories, or everything when unknown"""
+    if cats is None:
+        _users_by_cat.clear()
+        return
+
+    for cat in cats:
+        _users_by_cat.pop(cat, None)
+
+
+async def get_users_by_category(cat):
+    """Indexed per-category subscriber lookup with a short TTL cache"""
+    try:
+        now = time.monotonic()
+        cached = _users_by_cat.get(cat)
+        if cached and now - cached[0] <= USERS_BY_CAT_TTL:
+            return cached[1]
+
+        users = await db.get_users_by_cat(cat)
+        _users_by_cat[cat] = (now, users)
+        return users
+    except Exception as e:
+        log.error(f"Error getting users for cat {cat}: {e}")
+        return []
+
+
+async def get_users_snapshot():
+    """One user-table scan serving a whole delivery tick.
+
+    Returns (all_users, by_cat, active) built in a single pass and
+    primes the per-category cache, so the per-feed fan-out that follows
+    hits memory instead of issuing one query per category.
+    """
+    all_users = await db.get_all_users()
+
+    by_cat = {}
+    active = []
+    for user in all_users:
+        if user["cats"]:
+            active.append(user)
+            for cat in user["cats"]:
+                by_cat.setdefault(cat, []).append(user)
+
+    now = time.monotonic()
+    for cat, users in by_cat.items():
+        _users_by_cat[cat] = (now, users)
+
+    return all_users, by_cat, active
+
 
 async def setup_user(uid, uname, cats):
     try:
@@ -19,8 +139,11 @@ async def setup_user(uid, uname, cats):
             success = await db.add_user(uid, uname, cats)
         
         if success:
+            old_cats = user["cats"] if user else []
+            _invalidate_user(uid)
+            _invalidate_users_by_cat(set(old_cats) | set(cats))
             log.info(f"User {uname} ({uid}) subscribed to: {', '.join(cats)}")
-        
+
         return success
     except Exception as e:
         log.error(f"Error setting up user {uid}: {e}")
@@ -30,16 +153,15 @@ async def setup_user(uid, uname, cats):
 async def add_cat_to_user(uid, cat):
   
     try:
-        user = await db.get_user(uid)
+        user = await _get_user_cached(uid)
         if not user:
             return False
-        
-        cats = user["subscribed_cats"]
-        if cat not in cats:
-            cats.append(cat)
-            return await db.update_user_subscriptions(uid, cats)
-        
-        return True  
+
+        # The primary key on user_cats makes this an indexed upsert -
+        # no list scan or full subscription rewrite
+        _invalidate_user(uid)
+        _invalidate_users_by_cat([cat])
+        return await db.add_user_cat(uid, cat)
     except Exception as e:
         log.error(f"Error adding cat for user {uid}: {e}")
         return False
@@ -48,16 +170,13 @@ async def add_cat_to_user(uid, cat):
 async def remove_cat_from_user(uid, cat):
    
     try:
-        user = await db.get_user(uid)
+        user = await _get_user_cached(uid)
         if not user:
             return False
-        
-        cats = user["subscribed_cats"]
-        if cat in cats:
-            cats.remove(cat)
-            return await db.update_user_subscriptions(uid, cats)
-        
-        return True  
+
+        _invalidate_user(uid)
+        _invalidate_users_by_cat([cat])
+        return await db.remove_user_cat(uid, cat)
     except Exception as e:
         log.error(f"Error removing cat for user {uid}: {e}")
         return False
@@ -66,8 +185,8 @@ async def remove_cat_from_user(uid, cat):
 async def get_user_cats(uid):
    
     try:
-        user = await db.get_user(uid)
-        return user["subscribed_cats"] if user else []
+        user = await _get_user_cached(uid)
+        return user["cats"] if user else []
     except Exception as e:
         log.error(f"Error getting cats for user {uid}: {e}")
         return []
@@ -77,35 +196,23 @@ async def get_user_feeds(uid):
 
     try:
         cats = await get_user_cats(uid)
-        feeds = {}
-        
-        for cat in cats:
-            cat_feeds = await db.get_feeds_by_cat(cat)
-            if cat_feeds:
-                feeds[cat] = cat_feeds
-        
-        return feeds
+        # One batched query instead of a round-trip per category
+        feeds = await db.get_feeds_by_cats(cats)
+        return {cat: urls for cat, urls in feeds.items() if urls}
     except Exception as e:
         log.error(f"Error getting feeds for user {uid}: {e}")
         return {}
 
 
 async def get_users_by_cat(cat):
-   
-    try:
-        all_users = await db.get_all_users()
-        return [
-            user for user in all_users 
-            if cat in user["subscribed_cats"]
-        ]
-    except Exception as e:
-        log.error(f"Error getting users for cat {cat}: {e}")
-        return []
+
+    return await get_users_by_category(cat)
 
 
 async def add_keyword_filter(uid, keyword):
    
     try:
+        _invalidate_user(uid)
         return await db.add_user_keyword(uid, keyword)
     except Exception as e:
         log.error(f"Error adding keyword filter for user {uid}: {e}")
@@ -115,7 +222,7 @@ async def add_keyword_filter(uid, keyword):
 async def get_user_keywords(uid):
  
     try:
-        user = await db.get_user(uid)
+        user = await _get_user_cached(uid)
         return user["keywords"] if user else []
     except Exception as e:
         log.error(f"Error getting keywords for user {uid}: {e}")
@@ -133,7 +240,7 @@ async def should_show_post(uid, title, summary=""):
         
         
         content = f"{title} {summary}".lower()
-        return any(keyword.lower() in content for keyword in keywords)
+        return content_matches(keywords, content)
     
     except Exception as e:
         log.error(f"Error checking post filter for user {uid}: {e}")
@@ -143,14 +250,18 @@ async def should_show_post(uid, title, summary=""):
 async def get_user_stats(uid):
    
     try:
-        user = await db.get_user(uid)
+        user = await _get_user_cached(uid)
         if not user:
             return {}
-        
-        cats = user["subscribed_cats"]
-        feeds = await get_user_feeds(uid)
+
+        cats = user["cats"]
+        # The cats are already in hand, so skip get_user_feeds' refetch
+        # and overlap the two independent queries
+        feeds, unread_count = await asyncio.gather(
+            db.get_feeds_by_cats(cats),
+            db.get_unread_count(uid)
+        )
         total_feeds = sum(len(feed_list) for feed_list in feeds.values())
-        unread_count = await db.get_unread_count(uid)
         keywords = user["keywords"]
         
         return {
@@ -169,18 +280,19 @@ async def get_user_stats(uid):
 
 
 async def is_user_registered(uid):
-   
-    user = await db.get_user(uid)
-    return user is not None
+
+    # Answer from the user cache when warm, otherwise ask for just the
+    # existence bit instead of the full row
+    cached = _user_cache.get(uid)
+    if cached and time.monotonic() - cached[0] <= USER_CACHE_TTL:
+        return cached[1] is not None
+
+    return await db.user_exists(uid)
 
 
 async def get_all_active_users():
     try:
-        all_users = await db.get_all_users()
-        return [
-            user for user in all_users 
-            if len(user["subscribed_cats"]) > 0
-        ]
+        return await db.get_active_users()
     except Exception as e:
         log.error(f"Error getting active users: {e}")
         return []
@@ -1,14 +1,23 @@
 
+import functools
+import html
 import re
 import json
 import logging
 
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from urllib.parse import urlparse
 import discord
 
 log = logging.getLogger(__name__)
 
+# Compiled once - the hot paths run these per entry
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_IMG_RE = re.compile(r'<img[^>]+src=["\']([^"\']+)["\']')
+_CAT_SANITIZE_RE = re.compile(r'[^a-zA-Z0-9\s&-]')
+
 
 try:
     with open("config.json", "r") as f:
@@ -21,13 +30,18 @@ except Exception as e:
     }
 
 
+# Pure functions of the config - resolve once at import
+try:
+    _EMBED_COLOR = int(CONFIG.get("embed_color", "0x3498db"), 16)
+except Exception:
+    _EMBED_COLOR = 0x3498db
+
+_MAX_DESC = CONFIG.get("post_description_length", 200)
+
+
 def get_embed_color() -> int:
     """Get the embed color from config"""
-    try:
-        color_str = CONFIG.get("embed_color", "0x3498db")
-        return int(color_str, 16)
-    except:
-        return 0x3498db  
+    return _EMBED_COLOR
 
 
 def clean_html(text) -> str:
@@ -35,64 +49,99 @@ def clean_html(text) -> str:
     if not text:
         return ""
 
-    text = re.sub(r'<[^>]+>', '', text)
-    
+    # Strip tags first so entities inside dropped tags don't survive
+    text = _TAG_RE.sub('', text)
 
-    text = text.replace('&amp;', '&')
-    text = text.replace('&lt;', '<')
-    text = text.replace('&gt;', '>')
-    text = text.replace('&quot;', '"')
-    text = text.replace('&#39;', "'")
-    text = text.replace('&nbsp;', ' ')
-    
-  
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = html.unescape(text)
+
+
+    text = _WS_RE.sub(' ', text).strip()
     
     return text
 
 
-def truncate_text(text, max_length=200) -> str:
- 
-    if not text:
-        return ""
-    
-    text = clean_html(text)
-    
+def _truncate(text, max_length) -> str:
+    """Truncate already-clean text - just a slice, no regex work"""
     if len(text) <= max_length:
         return text
-   
+
     return text[:max_length-3].rstrip() + "..."
 
 
+def _preslice(text, limit) -> str:
+    """Slice raw HTML without leaving an unterminated tag at the cut.
+
+    A cut mid-tag leaves markup _TAG_RE can't strip, so drop anything
+    after a trailing '<' that never got its '>'.
+    """
+    if len(text) <= limit:
+        return text
+
+    text = text[:limit]
+    open_tag = text.rfind('<')
+    if open_tag != -1 and '>' not in text[open_tag:]:
+        return text[:open_tag]
+
+    return text
+
+
+def truncate_text(text, max_length=200) -> str:
+
+    if not text:
+        return ""
+
+    # Cleaning can only shrink the text, so drop the tail that could
+    # never survive truncation before running the regexes over it
+    text = clean_html(_preslice(text, max_length * 4))
+
+    return _truncate(text, max_length)
+
+
+@functools.lru_cache(maxsize=4096)
 def format_timestamp(timestamp_str) -> str:
-  
+
     if not timestamp_str:
         return "Unknown date"
-    
-    try:
-       
-        dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
-        return dt.strftime("%b %d, %Y %H:%M UTC")
-    except:
-        pass
-    
+
     try:
-       
-        from email.utils import parsedate_to_datetime
-        dt = parsedate_to_datetime(timestamp_str)
+        # ISO timestamps start with a digit, RFC-2822 with a weekday -
+        # dispatch on the first char instead of parse-and-fail
+        if timestamp_str[0].isdigit():
+            try:
+                dt = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+            except ValueError:
+                # RFC-2822 with the optional weekday omitted
+                dt = parsedate_to_datetime(timestamp_str)
+        else:
+            dt = parsedate_to_datetime(timestamp_str)
         return dt.strftime("%b %d, %Y %H:%M UTC")
-    except:
+    except Exception:
         pass
-    
-   
+
     return timestamp_str
 
 
 def is_valid_url(url):
+    """Cheap prefix check - good enough for the per-post hot path"""
+    if not url or not isinstance(url, str):
+        return False
+
+    if url.startswith('https://'):
+        rest = url[8:]
+    elif url.startswith('http://'):
+        rest = url[7:]
+    else:
+        return False
+
+    # Non-empty netloc
+    return bool(rest) and not rest.startswith('/')
+
+
+def is_valid_url_strict(url):
 
     if not url:
         return False
-    
+
     try:
         result = urlparse(url)
         return all([result.scheme, result.netloc]) and result.scheme in ['http', 'https']
@@ -100,56 +149,77 @@ def is_valid_url(url):
         return False
 
 
+def _thumb_from_media_content(media_list):
+    return next((m['url'] for m in media_list if 'url' in m), None)
+
+
+def _thumb_from_media_thumbnail(thumbs):
+    return thumbs[0].get('url')
+
+
+def _thumb_from_enclosures(enclosures):
+    return next((e.get('href') for e in enclosures
+                 if e.get('type', '').startswith('image/')), None)
+
+
+def _thumb_from_links(links):
+    return next((l.get('href') for l in links
+                 if l.get('rel') == 'enclosure'
+                 or l.get('type', '').startswith('image/')), None)
+
+
+@functools.lru_cache(maxsize=1024)
+def _extract_img(content):
+    """First <img src> in the content - memoized, since the same
+    summary recurs across categories and reprocessing"""
+    img_match = _IMG_RE.search(content)
+    return img_match.group(1) if img_match else None
+
+
+_THUMB_SOURCES = (
+    ('media_content', _thumb_from_media_content),
+    ('media_thumbnail', _thumb_from_media_thumbnail),
+    ('enclosures', _thumb_from_enclosures),
+    ('links', _thumb_from_links),
+)
+
+
 def get_entry_thumbnail(entry):
-  
+
     try:
-       
-        if hasattr(entry, 'media_content'):
-            for media in entry.media_content:
-                if 'url' in media:
-                    return media['url']
-        
-        
-        if hasattr(entry, 'media_thumbnail'):
-            if entry.media_thumbnail and len(entry.media_thumbnail) > 0:
-                return entry.media_thumbnail[0].get('url')
-        
-        
-        if hasattr(entry, 'enclosures'):
-            for enclosure in entry.enclosures:
-                if enclosure.get('type', '').startswith('image/'):
-                    return enclosure.get('href')
-        
-       
-        if hasattr(entry, 'links'):
-            for link in entry.links:
-                if link.get('rel') == 'enclosure' or link.get('type', '').startswith('image/'):
-                    return link.get('href')
-      
+        # feedparser entries are dict-like, so .get beats the
+        # hasattr/getattr double dispatch
+        for key, extractor in _THUMB_SOURCES:
+            val = entry.get(key)
+            if val:
+                url = extractor(val)
+                if url:
+                    return url
+
         content = entry.get('summary', '') or entry.get('description', '')
         if content:
-            img_match = re.search(r'<img[^>]+src=["\']([^"\']+)["\']', content)
-            if img_match:
-                return img_match.group(1)
-    
+            return _extract_img(content)
+
     except Exception as e:
         log.debug(f"Error extracting thumbnail: {e}")
-    
+
     return None
 
 
-def create_feed_embed(title, link, description, 
-                     category, published=None, 
-                     thumbnail_url=None) -> discord.Embed:
+def create_feed_embed(title, link, description,
+                     category, published=None,
+                     thumbnail_url=None, now=None) -> discord.Embed:
+
+    # Clean the description once here and slice, instead of letting
+    # truncate_text re-run the regexes
+    description = clean_html(_preslice(description, _MAX_DESC * 4)) if description else ""
 
-    max_desc_length = CONFIG.get("post_description_length", 200)
-    
     embed = discord.Embed(
         title=truncate_text(title, 256),
         url=link,
-        description=truncate_text(description, max_desc_length),
+        description=_truncate(description, _MAX_DESC),
         color=get_embed_color(),
-        timestamp=datetime.utcnow()
+        timestamp=now or datetime.now(timezone.utc)
     )
   
     embed.add_field(name="Category", value=category, inline=True)
@@ -169,14 +239,14 @@ def create_feed_embed(title, link, description,
     return embed
 
 
-def create_summary_embed(summary, total_posts, 
-                        categories) -> discord.Embed:
-  
+def create_summary_embed(summary, total_posts,
+                        categories, now=None) -> discord.Embed:
+
     embed = discord.Embed(
         title="📰 Your Daily Feed Summary",
-        description=summary[:4000],  
+        description=summary[:4000],
         color=get_embed_color(),
-        timestamp=datetime.utcnow()
+        timestamp=now or datetime.now(timezone.utc)
     )
     
     
@@ -200,23 +270,24 @@ def create_summary_embed(summary, total_posts,
     return embed
 
 
-def create_info_embed(title, description, 
+_COLOR_MAP = {
+    "blue": 0x3498db,
+    "green": 0x2ecc71,
+    "red": 0xe74c3c,
+    "yellow": 0xf39c12,
+    "purple": 0x9b59b6
+}
+
+
+def create_info_embed(title, description,
                      fields = None,
-                     color="blue") -> discord.Embed:
-   
-    color_map = {
-        "blue": 0x3498db,
-        "green": 0x2ecc71,
-        "red": 0xe74c3c,
-        "yellow": 0xf39c12,
-        "purple": 0x9b59b6
-    }
-    
+                     color="blue", now=None) -> discord.Embed:
+
     embed = discord.Embed(
         title=title,
         description=description,
-        color=color_map.get(color, get_embed_color()),
-        timestamp=datetime.utcnow()
+        color=_COLOR_MAP.get(color, _EMBED_COLOR),
+        timestamp=now or datetime.now(timezone.utc)
     )
     
     if fields:
@@ -246,13 +317,25 @@ def create_success_embed(message) -> discord.Embed:
     )
 
 
-def create_help_embed() -> discord.Embed:
+_help_embed = None
+
+
+def create_help_embed(now=None) -> discord.Embed:
+
+    global _help_embed
+
+    now = now or datetime.now(timezone.utc)
+
+    # The help embed is fully static - build it once and refresh the timestamp
+    if _help_embed is not None:
+        _help_embed.timestamp = now
+        return _help_embed
 
     embed = discord.Embed(
         title="🤖 FeedyBot AI - Help",
         description="Stay updated with RSS feeds and AI-powered summaries!",
         color=get_embed_color(),
-        timestamp=datetime.utcnow()
+        timestamp=now
     )
     
     embed.add_field(
@@ -295,7 +378,8 @@ def create_help_embed() -> discord.Embed:
     )
     
     embed.set_footer(text="FeedyBot AI • Powered by GPT4Free (g4f)")
-    
+
+    _help_embed = embed
     return embed
 
 
@@ -303,35 +387,34 @@ def format_category_list(categories: list, subscribed: list = None) -> str:
 
     if not categories:
         return "No categories available."
-    
-    lines = []
-    for category in sorted(categories):
-        if subscribed and category in subscribed:
-            lines.append(f"✅ **{category}**")
-        else:
-            lines.append(f"⬜ {category}")
-    
-    return "\n".join(lines)
+
+    # Hash membership instead of a list scan per category
+    subs = frozenset(subscribed) if subscribed else frozenset()
+
+    return "\n".join(
+        f"✅ **{category}**" if category in subs else f"⬜ {category}"
+        for category in sorted(categories)
+    )
 
 
 def format_feed_list(feeds: list, max_display=10) -> str:
 
     if not feeds:
         return "No feeds in this category."
-    
-    lines = []
-    for i, feed in enumerate(feeds[:max_display], 1):
-        lines.append(f"{i}. {feed}")
-    
+
+    listing = "\n".join(
+        f"{i}. {feed}" for i, feed in enumerate(feeds[:max_display], 1)
+    )
+
     if len(feeds) > max_display:
-        lines.append(f"\n... and {len(feeds) - max_display} more")
-    
-    return "\n".join(lines)
+        listing += f"\n\n... and {len(feeds) - max_display} more"
+
+    return listing
 
 
 def sanitize_category_name(name) -> str:
 
-    name = re.sub(r'[^a-zA-Z0-9\s&-]', '', name)
+    name = _CAT_SANITIZE_RE.sub('', name)
     
     name = ' '.join(name.split())
     